@@ -0,0 +1,62 @@
+import argparse
+import sys
+from datetime import date
+from typing import List, Optional
+
+from backend.config import get_settings
+from backend.services.cpi import CPIDataError, CPIFetcherService, CPISnapshot
+
+# First year of the GENESIS monthly CPI table 61111-0002.
+DEFAULT_START_YEAR = 1991
+
+
+def _export(args: argparse.Namespace) -> None:
+    settings = get_settings().model_copy(update={"cpi_snapshot_path": None})
+    service = CPIFetcherService(settings)
+    infos = service.fetch_october_cpis(args.start_year, args.end_year)
+    CPISnapshot.write(args.output, {year: info.cpi_index for year, info in infos.items()})
+    snapshot = CPISnapshot(args.output)
+    print(
+        f"Wrote {len(infos)} October CPI values "
+        f"({snapshot.start_year}-{snapshot.end_year}) to {args.output}"
+    )
+
+
+def _import(args: argparse.Namespace) -> None:
+    target = args.target or get_settings().cpi_snapshot_path
+    if not target:
+        raise CPIDataError("No target given: pass --target or set CPI_SNAPSHOT_PATH")
+    snapshot = CPISnapshot.install(args.snapshot, target)
+    print(f"Imported CPI snapshot ({snapshot.start_year}-{snapshot.end_year}) to {target}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog="python -m backend.cli", description="Offline CPI snapshot tools."
+    )
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    export = commands.add_parser("export", help="Fetch October CPI values from GENESIS into a snapshot")
+    export.add_argument("output", help="Snapshot file to write")
+    export.add_argument("--start-year", type=int, default=DEFAULT_START_YEAR)
+    export.add_argument("--end-year", type=int, default=date.today().year - 1)
+    export.set_defaults(func=_export)
+
+    import_ = commands.add_parser("import", help="Validate a snapshot and install it for the backend")
+    import_.add_argument("snapshot", help="Snapshot file to import")
+    import_.add_argument(
+        "--target", help="Destination path (defaults to CPI_SNAPSHOT_PATH from the settings)"
+    )
+    import_.set_defaults(func=_import)
+
+    args = parser.parse_args(argv)
+    try:
+        args.func(args)
+    except (CPIDataError, OSError) as exc:
+        print(f"error: {exc}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
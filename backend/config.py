@@ -1,5 +1,5 @@
 from functools import lru_cache
-from typing import Optional
+from typing import List, Optional
 
 from pydantic import Field
 from pydantic_settings import BaseSettings, SettingsConfigDict
@@ -23,10 +23,58 @@ class Settings(BaseSettings):
         default="https://www-genesis.destatis.de/genesisWS/rest/2020",
         description="GENESIS REST API base URL",
     )
+    cpi_snapshot_path: Optional[str] = Field(
+        default=None,
+        description="Offline CPI snapshot file; if set, CPI is read from it instead of GENESIS",
+    )
 
     
     openai_api_key: Optional[str] = Field(default=None, description="OpenAI API key for AI Analyst")
     openai_model: str = Field(default="gpt-4o-mini", description="OpenAI model for analysis")
+    openai_max_concurrency: int = Field(
+        default=8, ge=1, description="Max concurrent AI Analyst calls for portfolio analysis"
+    )
+    openai_token_budget: Optional[int] = Field(
+        default=None, ge=1, description="Token budget per portfolio analysis (unlimited if unset)"
+    )
+    openai_batch_max_items: int = Field(
+        default=1000, ge=1, description="Max properties per batch request with AI analysis"
+    )
+    openai_max_retries: int = Field(
+        default=5, ge=0, description="Retries on OpenAI rate limits and transient errors before giving up"
+    )
+    openai_retry_base_delay: float = Field(
+        default=1.0, gt=0, description="Base delay in seconds for exponential retry backoff"
+    )
+    openai_retry_max_delay: float = Field(
+        default=60.0, gt=0, description="Upper bound in seconds for a single retry delay"
+    )
+
+    admission_cheap_max_concurrency: int = Field(
+        default=32, ge=1, description="Max concurrent pure-math /calculate requests"
+    )
+    admission_cheap_queue_depth: int = Field(
+        default=64, ge=0, description="Max pure-math requests waiting for a slot"
+    )
+    admission_expensive_max_concurrency: int = Field(
+        default=4, ge=1, description="Max concurrent requests with AI analysis"
+    )
+    admission_expensive_queue_depth: int = Field(
+        default=8, ge=0, description="Max requests with AI analysis waiting for a slot"
+    )
+    admission_queue_timeout: float = Field(
+        default=10.0, gt=0, description="Seconds a queued request waits before it is rejected"
+    )
+    admission_retry_after: int = Field(
+        default=5, ge=0, description="Retry-After seconds sent when a pool is saturated"
+    )
+    rate_limit_requests_per_minute: Optional[int] = Field(
+        default=None, ge=1, description="Per-client request limit (unlimited if unset)"
+    )
+    rate_limit_api_keys: List[str] = Field(
+        default_factory=list,
+        description="API keys (JSON list) that get their own rate limit; others are limited per client address",
+    )
 
     api_host: str = Field(default="0.0.0.0", description="Host for the API server")
     api_port: int = Field(default=8000, ge=1, le=65535, description="Port for the API server")
@@ -80,6 +128,31 @@ class CalculationConfig(BaseSettings):
         ),
         description="User-side prompt requirements for the AI Analyst.",
     )
+    agent_portfolio_requirements: str = Field(
+        default=(
+            "Requirements:\n"
+            "1) Summarize the portfolio as a whole: mix of residential and commercial properties, "
+            "typical land/building split, and the overall relation of theoretical values to "
+            "purchase prices.\n"
+            "2) Point out notable outliers (e.g. unusually high land share or large deviation from "
+            "the theoretical value) by their index.\n"
+            "3) Keep it under about 400 words and structure it into short paragraphs or bullet points.\n"
+        ),
+        description="User-side prompt requirements for the AI Analyst portfolio summary.",
+    )
+    agent_portfolio_excerpt_chars: int = Field(
+        default=200,
+        ge=0,
+        description="Max characters of each per-property analysis passed to the portfolio summary.",
+    )
+    agent_portfolio_max_input_tokens: int = Field(
+        default=16000,
+        ge=1,
+        description=(
+            "Approximate token cap for the portfolio summary input; excerpts and then "
+            "trailing properties are dropped to stay within it."
+        ),
+    )
 
 @lru_cache
 def get_settings() -> Settings:
@@ -1,10 +1,23 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 
 from backend.config import get_settings
 from backend.routers.routers import router
+from backend.services.agent import get_agent_service
+from backend.services.cpi import get_cpi_service
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Open the offline CPI snapshot (if configured) before serving requests.
+    get_cpi_service()
+    yield
+    await get_agent_service().aclose()
+
 
-app = FastAPI(title="KPA Tool")
+app = FastAPI(title="KPA Tool", lifespan=lifespan)
 
 app.add_middleware(
     CORSMiddleware,
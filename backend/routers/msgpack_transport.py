@@ -0,0 +1,203 @@
+import json
+from typing import Any, AsyncIterable, AsyncIterator, Awaitable, Callable, List, Optional, Type, TypeVar
+
+import msgpack
+from fastapi import HTTPException, Request, Response
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse, StreamingResponse
+from pydantic import BaseModel, ValidationError
+
+MSGPACK_MEDIA_TYPES = ("application/msgpack", "application/x-msgpack")
+MSGPACK_MEDIA_TYPE = MSGPACK_MEDIA_TYPES[0]
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+M = TypeVar("M", bound=BaseModel)
+
+# Responses differ by Accept, so caches must key on it.
+VARY_ACCEPT = {"Vary": "Accept"}
+
+# OpenAPI "responses" entry advertising the binary alternative.
+MSGPACK_RESPONSES = {200: {"content": {MSGPACK_MEDIA_TYPE: {}}}}
+
+
+class MsgPackResponse(Response):
+    """Response rendered as MessagePack."""
+
+    media_type = MSGPACK_MEDIA_TYPE
+
+    def render(self, content: Any) -> bytes:
+        return msgpack.packb(content, use_bin_type=True)
+
+
+def _media_type(content_type: str) -> str:
+    return content_type.split(";")[0].strip().lower()
+
+
+def _is_json(content_type: Optional[str]) -> bool:
+    """JSON bodies must say so (or omit Content-Type), so cross-site simple requests are refused."""
+    if content_type is None:
+        return True
+    media_type = _media_type(content_type)
+    return media_type == "application/json" or (
+        media_type.startswith("application/") and media_type.endswith("+json")
+    )
+
+
+def _quality(params: List[str]) -> float:
+    for param in params:
+        name, _, value = param.partition("=")
+        if name.strip().lower() == "q":
+            try:
+                return float(value)
+            except ValueError:
+                return 0.0
+    return 1.0
+
+
+def _accepts_msgpack(accept: Optional[str]) -> bool:
+    """
+    True if Accept names MessagePack with q > 0 and at least as preferred as JSON
+    (application/json or a wildcard); JSON stays the default.
+    """
+    if not accept:
+        return False
+    msgpack_q = json_q = 0.0
+    for part in accept.split(","):
+        media_type, *params = part.split(";")
+        media_type = media_type.strip().lower()
+        if media_type in MSGPACK_MEDIA_TYPES:
+            msgpack_q = max(msgpack_q, _quality(params))
+        elif media_type in ("application/json", "application/*", "*/*"):
+            json_q = max(json_q, _quality(params))
+    return msgpack_q > 0 and msgpack_q >= json_q
+
+
+def parsed_body(model: Type[M]) -> Callable[[Request], Awaitable[M]]:
+    """
+    Dependency that reads a JSON or MessagePack body (by Content-Type) and
+    validates it against the given schema. Other content types get 415.
+    """
+
+    async def dependency(request: Request) -> M:
+        content_type = request.headers.get("content-type")
+        if content_type is not None and _media_type(content_type) in MSGPACK_MEDIA_TYPES:
+            body = await request.body()
+            try:
+                data = msgpack.unpackb(body, raw=False)
+            except (msgpack.UnpackException, ValueError) as exc:
+                raise HTTPException(status_code=400, detail="Invalid MessagePack body") from exc
+        elif _is_json(content_type):
+            body = await request.body()
+            try:
+                data = json.loads(body)
+            except ValueError as exc:
+                raise HTTPException(status_code=400, detail="Invalid JSON body") from exc
+        else:
+            raise HTTPException(
+                status_code=415,
+                detail=f"Unsupported Content-Type, use application/json or {MSGPACK_MEDIA_TYPE}",
+            )
+        try:
+            return model.model_validate(data)
+        except ValidationError as exc:
+            errors = [
+                {**error, "loc": ("body", *error["loc"])}
+                for error in exc.errors(include_url=False)
+            ]
+            raise RequestValidationError(errors, body=data) from exc
+
+    return dependency
+
+
+def _inline_refs(schema: dict) -> dict:
+    defs = schema.pop("$defs", {})
+
+    def resolve(node: Any) -> Any:
+        if isinstance(node, dict):
+            if "$ref" in node:
+                return resolve(defs[node["$ref"].rsplit("/", 1)[-1]])
+            return {k: resolve(v) for k, v in node.items()}
+        if isinstance(node, list):
+            return [resolve(v) for v in node]
+        return node
+
+    return resolve(schema)
+
+
+def request_body_openapi(model: Type[BaseModel]) -> dict:
+    """OpenAPI 'openapi_extra' documenting a parsed_body() request body in both formats."""
+    schema = _inline_refs(model.model_json_schema())
+    return {
+        "requestBody": {
+            "required": True,
+            "content": {
+                "application/json": {"schema": schema},
+                MSGPACK_MEDIA_TYPE: {"schema": schema},
+            },
+        }
+    }
+
+
+def negotiate(request: Request, model: BaseModel) -> Response:
+    """Return the model as MessagePack if the client prefers it, else as JSON."""
+    content = model.model_dump(mode="json")
+    if _accepts_msgpack(request.headers.get("accept")):
+        return MsgPackResponse(content, headers=VARY_ACCEPT)
+    return JSONResponse(content, headers=VARY_ACCEPT)
+
+
+def stream_objects(request: Request, objects: AsyncIterable[dict]) -> StreamingResponse:
+    """
+    Stream objects as they are produced: concatenated MessagePack objects if the
+    client accepts them, else newline-delimited JSON.
+    """
+    if _accepts_msgpack(request.headers.get("accept")):
+        packer = msgpack.Packer(use_bin_type=True)
+
+        async def msgpack_body() -> AsyncIterator[bytes]:
+            async for obj in objects:
+                yield packer.pack(obj)
+
+        return StreamingResponse(
+            msgpack_body(), media_type=MSGPACK_MEDIA_TYPE, headers=VARY_ACCEPT
+        )
+
+    async def ndjson_body() -> AsyncIterator[bytes]:
+        async for obj in objects:
+            yield (json.dumps(obj, separators=(",", ":")) + "\n").encode()
+
+    return StreamingResponse(
+        ndjson_body(), media_type=NDJSON_MEDIA_TYPE, headers=VARY_ACCEPT
+    )
+
+
+def stream_object_list(
+    request: Request, key: str, items: AsyncIterable[dict], length: int
+) -> StreamingResponse:
+    """
+    Stream '{key: [item, ...]}' one item at a time, as MessagePack if the client
+    accepts it, else as JSON.
+    """
+    if _accepts_msgpack(request.headers.get("accept")):
+        packer = msgpack.Packer(use_bin_type=True)
+
+        async def msgpack_body() -> AsyncIterator[bytes]:
+            yield packer.pack_map_header(1) + packer.pack(key) + packer.pack_array_header(length)
+            async for item in items:
+                yield packer.pack(item)
+
+        return StreamingResponse(
+            msgpack_body(), media_type=MSGPACK_MEDIA_TYPE, headers=VARY_ACCEPT
+        )
+
+    async def json_body() -> AsyncIterator[bytes]:
+        yield f"{{{json.dumps(key)}:[".encode()
+        separator = ""
+        async for item in items:
+            yield (separator + json.dumps(item, separators=(",", ":"))).encode()
+            separator = ","
+        yield b"]}"
+
+    return StreamingResponse(
+        json_body(), media_type="application/json", headers=VARY_ACCEPT
+    )
@@ -1,35 +1,145 @@
-from typing import Optional
+from typing import AsyncIterator, Dict, List, Optional
 
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, Response
+from fastapi.responses import StreamingResponse
 
 from backend.config import Settings, get_settings
-from backend.schemas.schemas import CalcRequest, CalcResponse
-from backend.services.agent import AIAnalystService
-from backend.services.calc import CalcService
-from backend.services.cpi import CPIDataError, CPIFetcherService
+from backend.routers.msgpack_transport import (
+    MSGPACK_MEDIA_TYPE,
+    MSGPACK_RESPONSES,
+    NDJSON_MEDIA_TYPE,
+    negotiate,
+    parsed_body,
+    request_body_openapi,
+    stream_object_list,
+    stream_objects,
+)
+from backend.schemas.schemas import (
+    BatchCalcRequest,
+    BatchCalcSummary,
+    CalcBreakdown,
+    CalcRequest,
+    CalcResponse,
+    TimelineRequest,
+    TimelineResponse,
+)
+from backend.services.admission import (
+    AdmissionController,
+    AdmissionPool,
+    AdmissionRejected,
+    AdmissionTicket,
+    get_admission_controller,
+)
+from backend.services.agent import (
+    AIAnalystService,
+    PortfolioItem,
+    PropertyAnalysis,
+    get_agent_service,
+)
+from backend.services.calc import CalcBreakdownColumns, CalcService
+from backend.services.cpi import CPIDataError, CPIFetcherService, CPIInfo, get_cpi_service
 
 router = APIRouter()
 
 
-def _cpi_service(settings: Settings = Depends(get_settings)) -> CPIFetcherService:
-    return CPIFetcherService(settings)
+# Dependencies handing out shared state are async so they run on the event loop,
+# not concurrently in the threadpool.
+async def _cpi_service() -> CPIFetcherService:
+    return get_cpi_service()
 
 
 def _calc_service() -> CalcService:
     return CalcService()
 
 
-def _agent_service(settings: Settings = Depends(get_settings)) -> AIAnalystService:
-    return AIAnalystService(settings)
+async def _agent_service() -> AIAnalystService:
+    return get_agent_service()
 
 
-@router.post("/calculate", response_model=CalcResponse)
+async def _admission() -> AdmissionController:
+    return get_admission_controller()
+
+
+def _rejection(exc: AdmissionRejected) -> HTTPException:
+    return HTTPException(
+        status_code=exc.status_code,
+        detail=str(exc),
+        headers={"Retry-After": str(exc.retry_after)},
+    )
+
+
+async def _rate_limit(
+    request: Request,
+    x_api_key: Optional[str] = Header(None),
+    admission: AdmissionController = Depends(_admission),
+) -> None:
+    client_address = request.client.host if request.client else "unknown"
+    try:
+        admission.rate_limiter.check(admission.rate_limiter.key_for(x_api_key, client_address))
+    except AdmissionRejected as exc:
+        raise _rejection(exc) from exc
+
+
+async def _admission_ticket() -> AsyncIterator[AdmissionTicket]:
+    # Released after the response is sent, so streamed bodies keep their slot.
+    ticket = AdmissionTicket()
+    try:
+        yield ticket
+    finally:
+        ticket.release()
+
+
+async def _admit(ticket: AdmissionTicket, pool: AdmissionPool) -> None:
+    try:
+        await ticket.acquire(pool)
+    except AdmissionRejected as exc:
+        raise _rejection(exc) from exc
+
+
+def _response_row(
+    calcs: CalcBreakdownColumns, index: int, cpi_info: CPIInfo, analysis_text: Optional[str]
+) -> dict:
+    """One CalcResponse as a plain dict, read straight from the result columns."""
+    return {
+        **calcs.row(index),
+        "cpi_index": cpi_info.cpi_index,
+        "cpi_year": cpi_info.year,
+        "cpi_month": cpi_info.month,
+        "index_factor": cpi_info.index_factor,
+        "analysis_text": analysis_text,
+    }
+
+
+def _build_response(
+    calc: CalcBreakdown, cpi_info: CPIInfo, analysis_text: Optional[str]
+) -> CalcResponse:
+    return CalcResponse(
+        **calc.model_dump(),
+        cpi_index=cpi_info.cpi_index,
+        cpi_year=cpi_info.year,
+        cpi_month=cpi_info.month,
+        index_factor=cpi_info.index_factor,
+        analysis_text=analysis_text,
+    )
+
+
+@router.post(
+    "/calculate",
+    response_model=CalcResponse,
+    responses=MSGPACK_RESPONSES,
+    openapi_extra=request_body_openapi(CalcRequest),
+    dependencies=[Depends(_rate_limit)],
+)
 async def calculate(
-    req: CalcRequest,
+    request: Request,
+    req: CalcRequest = Depends(parsed_body(CalcRequest)),
     cpi_service: CPIFetcherService = Depends(_cpi_service),
     calc_service: CalcService = Depends(_calc_service),
     agent_service: AIAnalystService = Depends(_agent_service),
-) -> CalcResponse:
+    admission: AdmissionController = Depends(_admission),
+    ticket: AdmissionTicket = Depends(_admission_ticket),
+) -> Response:
+    await _admit(ticket, admission.pool(req.with_analysis))
     try:
         cpi_info = await cpi_service.get_cpi_for_prev_year(req.purchase_date)
     except CPIDataError as exc:
@@ -44,7 +154,7 @@ async def calculate(
     analysis_text: Optional[str] = None
     if req.with_analysis:
         try:
-            analysis_text = agent_service.generate_analysis(
+            analysis_text = await agent_service.generate_analysis(
                 property_type=req.property_type,
                 cpi_index=cpi_info.cpi_index,
                 index_factor=cpi_info.index_factor,
@@ -53,12 +163,134 @@ async def calculate(
         except Exception as exc:  # noqa: BLE001
             analysis_text = f"AI analysis unavailable: {exc}"
 
-    return CalcResponse(
-        **calc.model_dump(),
-        cpi_index=cpi_info.cpi_index,
-        cpi_year=cpi_info.year,
-        cpi_month=cpi_info.month,
-        index_factor=cpi_info.index_factor,
-        analysis_text=analysis_text,
+    return negotiate(request, _build_response(calc, cpi_info, analysis_text))
+
+
+@router.post(
+    "/calculate/batch",
+    responses={
+        200: {
+            "description": (
+                "Stream of BatchCalcResult objects, one per property as it finishes, "
+                "followed by one BatchCalcSummary when with_analysis is set. NDJSON, or "
+                "concatenated MessagePack objects with 'Accept: application/msgpack'."
+            ),
+            "content": {NDJSON_MEDIA_TYPE: {}, MSGPACK_MEDIA_TYPE: {}},
+        }
+    },
+    openapi_extra=request_body_openapi(BatchCalcRequest),
+    dependencies=[Depends(_rate_limit)],
+)
+async def calculate_batch(
+    request: Request,
+    req: BatchCalcRequest = Depends(parsed_body(BatchCalcRequest)),
+    cpi_service: CPIFetcherService = Depends(_cpi_service),
+    calc_service: CalcService = Depends(_calc_service),
+    agent_service: AIAnalystService = Depends(_agent_service),
+    admission: AdmissionController = Depends(_admission),
+    ticket: AdmissionTicket = Depends(_admission_ticket),
+    settings: Settings = Depends(get_settings),
+) -> StreamingResponse:
+    if req.with_analysis and len(req.items) > settings.openai_batch_max_items:
+        raise HTTPException(
+            status_code=422,
+            detail=(
+                f"Batches with with_analysis are limited to "
+                f"{settings.openai_batch_max_items} properties"
+            ),
+        )
+    await _admit(ticket, admission.pool(req.with_analysis))
+
+    # Purchase year Y is indexed with the October CPI of Y - 1; all years in one range lookup.
+    cpi_years = [item.purchase_date.year - 1 for item in req.items]
+    try:
+        series = await cpi_service.get_october_series(min(cpi_years), max(cpi_years))
+    except CPIDataError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+    cpi_by_year: Dict[int, CPIInfo] = {cpi_info.year: cpi_info for cpi_info in series}
+
+    cpi_infos: List[CPIInfo] = [cpi_by_year[year] for year in cpi_years]
+    calcs = calc_service.calculate_batch(
+        req.items, [cpi_info.index_factor for cpi_info in cpi_infos]
     )
 
+    def result_line(index: int, analysis_text: Optional[str]) -> dict:
+        # Same fields as BatchCalcResult, without building a model per row.
+        return {**_response_row(calcs, index, cpi_infos[index], analysis_text), "index": index}
+
+    async def lines() -> AsyncIterator[dict]:
+        if not req.with_analysis:
+            for index in range(len(calcs)):
+                yield result_line(index, None)
+            return
+
+        portfolio = [
+            PortfolioItem(
+                property_type=item.property_type,
+                actual_purchase_price=item.actual_purchase_price,
+                cpi_index=cpi_info.cpi_index,
+                index_factor=cpi_info.index_factor,
+                calc=calc,
+            )
+            for item, cpi_info, calc in zip(req.items, cpi_infos, calcs)
+        ]
+        pending = set(range(len(calcs)))
+        try:
+            async for result in agent_service.stream_portfolio_analysis(portfolio):
+                if isinstance(result, PropertyAnalysis):
+                    pending.discard(result.index)
+                    yield result_line(result.index, result.analysis_text)
+                else:
+                    yield BatchCalcSummary(
+                        portfolio_summary=result.summary_text,
+                        tokens_used=result.total_tokens_used,
+                    ).model_dump(mode="json")
+        except Exception as exc:  # noqa: BLE001
+            for index in sorted(pending):
+                yield result_line(index, f"AI analysis unavailable: {exc}")
+            yield BatchCalcSummary(
+                portfolio_summary=f"AI analysis unavailable: {exc}"
+            ).model_dump(mode="json")
+
+    return stream_objects(request, lines())
+
+
+@router.post(
+    "/calculate/timeline",
+    response_model=TimelineResponse,
+    responses=MSGPACK_RESPONSES,
+    openapi_extra=request_body_openapi(TimelineRequest),
+    dependencies=[Depends(_rate_limit)],
+)
+async def calculate_timeline(
+    request: Request,
+    req: TimelineRequest = Depends(parsed_body(TimelineRequest)),
+    cpi_service: CPIFetcherService = Depends(_cpi_service),
+    calc_service: CalcService = Depends(_calc_service),
+    admission: AdmissionController = Depends(_admission),
+    ticket: AdmissionTicket = Depends(_admission_ticket),
+) -> StreamingResponse:
+    await _admit(ticket, admission.pool(False))
+    # Purchase year Y is indexed with the October CPI of Y - 1.
+    try:
+        series = await cpi_service.get_october_series(req.start_year - 1, req.end_year - 1)
+    except CPIDataError as exc:
+        raise HTTPException(status_code=503, detail=str(exc)) from exc
+
+    calcs = calc_service.calculate_series(req.request, series.index_factors)
+
+    async def entries() -> AsyncIterator[dict]:
+        # Same fields as TimelineEntry, without building a model per row.
+        for index, cpi_info in enumerate(series):
+            yield {
+                **_response_row(calcs, index, cpi_info, None),
+                "purchase_year": cpi_info.year + 1,
+            }
+
+    return stream_object_list(request, "entries", entries(), len(calcs))
+
+
+@router.get("/metrics")
+async def metrics(admission: AdmissionController = Depends(_admission)) -> dict:
+    """Admission pool queue depths and rejection counts."""
+    return admission.metrics()
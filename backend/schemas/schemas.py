@@ -1,8 +1,8 @@
 from datetime import date
 from enum import Enum
-from typing import Optional
+from typing import List, Optional
 
-from pydantic import BaseModel, Field, field_validator
+from pydantic import BaseModel, Field, field_validator, model_validator
 
 
 class PropertyType(str, Enum):
@@ -71,3 +71,62 @@ class CalcResponse(CalcBreakdown):
     index_factor: float
     analysis_text: Optional[str] = None
 
+
+
+class BatchCalcRequest(BaseModel):
+    items: List[CalcRequest] = Field(
+        ...,
+        min_length=1,
+        description="Properties to value (at most OPENAI_BATCH_MAX_ITEMS with with_analysis)",
+    )
+    with_analysis: bool = Field(
+        False,
+        description=(
+            "If true, include AI Analyst Insight per property and a portfolio summary "
+            "(overrides the per-item with_analysis flag)"
+        ),
+    )
+
+
+class BatchCalcResult(CalcResponse):
+    index: int
+
+
+class BatchCalcSummary(BaseModel):
+    portfolio_summary: Optional[str] = None
+    tokens_used: Optional[int] = None
+
+
+class TimelineProperty(CalcRequest):
+    purchase_date: Optional[date] = Field(
+        None, description="Ignored; the timeline covers every purchase year in the range"
+    )
+
+
+class TimelineRequest(BaseModel):
+    request: TimelineProperty = Field(
+        ..., description="Property to value; purchase_date and with_analysis are ignored"
+    )
+    start_year: int = Field(2002, ge=2002, description="First purchase year of the timeline")
+    end_year: Optional[int] = Field(
+        None, description="Last purchase year of the timeline (defaults to the current year)"
+    )
+
+    @model_validator(mode="after")
+    def validate_year_range(self) -> "TimelineRequest":
+        current_year = date.today().year
+        if self.end_year is None:
+            self.end_year = current_year
+        if not self.start_year <= self.end_year <= current_year:
+            raise ValueError(
+                f"Year range must satisfy start_year <= end_year <= {current_year}"
+            )
+        return self
+
+
+class TimelineEntry(CalcResponse):
+    purchase_year: int
+
+
+class TimelineResponse(BaseModel):
+    entries: List[TimelineEntry]
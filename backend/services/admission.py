@@ -0,0 +1,194 @@
+import asyncio
+import math
+import time
+from functools import lru_cache
+from typing import Dict, Iterable, Optional, Tuple
+
+from backend.config import Settings, get_settings
+
+
+class AdmissionRejected(RuntimeError):
+    """Raised when a request is not admitted (pool saturated or rate limit exceeded)."""
+
+    def __init__(self, message: str, status_code: int, retry_after: int) -> None:
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+
+class AdmissionPool:
+    """Concurrency limit with a bounded queue of waiting requests."""
+
+    def __init__(
+        self,
+        name: str,
+        max_concurrency: int,
+        queue_depth: int,
+        queue_timeout: float,
+        retry_after: int,
+    ) -> None:
+        self.name = name
+        self.max_concurrency = max_concurrency
+        self.queue_depth = queue_depth
+        self._queue_timeout = queue_timeout
+        self._retry_after = retry_after
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.in_flight = 0
+        self.queued = 0
+        self.admitted = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    def _reject(self, reason: str) -> AdmissionRejected:
+        return AdmissionRejected(
+            f"{self.name} pool {reason}, retry later",
+            status_code=503,
+            retry_after=self._retry_after,
+        )
+
+    async def acquire(self) -> None:
+        """Wait for a slot of the pool; fail fast when the queue is full."""
+        if self._semaphore.locked() and self.queued >= self.queue_depth:
+            self.rejected += 1
+            raise self._reject("saturated")
+
+        self.queued += 1
+        try:
+            await asyncio.wait_for(self._semaphore.acquire(), self._queue_timeout)
+        except asyncio.TimeoutError:
+            self.timed_out += 1
+            raise self._reject("queue timeout") from None
+        finally:
+            self.queued -= 1
+
+        self.admitted += 1
+        self.in_flight += 1
+
+    def release(self) -> None:
+        self.in_flight -= 1
+        self._semaphore.release()
+
+    def metrics(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "queue_capacity": self.queue_depth,
+            "in_flight": self.in_flight,
+            "queue_depth": self.queued,
+            "admitted": self.admitted,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+
+class RateLimiter:
+    """
+    Token bucket per client; disabled when requests_per_minute is None.
+    Only configured API keys get their own bucket, anything else is limited by
+    client address, so sending made-up keys does not bypass the limit.
+    Not thread-safe: call it from the event loop only.
+    """
+
+    def __init__(
+        self, requests_per_minute: Optional[int], api_keys: Iterable[str] = ()
+    ) -> None:
+        self._capacity = requests_per_minute
+        self._api_keys = frozenset(api_keys)
+        self._buckets: Dict[str, Tuple[float, float]] = {}
+        self._last_sweep = time.monotonic()
+        self.rejected = 0
+
+    def key_for(self, api_key: Optional[str], client_address: str) -> str:
+        if api_key and api_key in self._api_keys:
+            return f"key:{api_key}"
+        return f"addr:{client_address}"
+
+    def _sweep(self, now: float) -> None:
+        """Drop buckets idle long enough to have refilled completely (at most once a minute)."""
+        if now - self._last_sweep < 60.0:
+            return
+        self._last_sweep = now
+        self._buckets = {
+            key: bucket for key, bucket in self._buckets.items() if now - bucket[1] < 60.0
+        }
+
+    def check(self, key: str) -> None:
+        if self._capacity is None:
+            return
+        rate = self._capacity / 60.0
+        now = time.monotonic()
+        self._sweep(now)
+        tokens, last = self._buckets.get(key, (float(self._capacity), now))
+        tokens = min(float(self._capacity), tokens + (now - last) * rate)
+        if tokens < 1.0:
+            self._buckets[key] = (tokens, now)
+            self.rejected += 1
+            raise AdmissionRejected(
+                "Rate limit exceeded",
+                status_code=429,
+                retry_after=math.ceil((1.0 - tokens) / rate),
+            )
+        self._buckets[key] = (tokens - 1.0, now)
+
+    def metrics(self) -> dict:
+        return {
+            "requests_per_minute": self._capacity,
+            "tracked_keys": len(self._buckets),
+            "rejected": self.rejected,
+        }
+
+
+class AdmissionTicket:
+    """Holds at most one pool slot for a request until the request (or its stream) ends."""
+
+    def __init__(self) -> None:
+        self._pool: Optional[AdmissionPool] = None
+
+    async def acquire(self, pool: AdmissionPool) -> None:
+        await pool.acquire()
+        self._pool = pool
+
+    def release(self) -> None:
+        if self._pool is not None:
+            self._pool.release()
+            self._pool = None
+
+
+class AdmissionController:
+    """Separate pools for cheap (pure math) and expensive (AI Analyst) requests."""
+
+    def __init__(self, settings: Settings) -> None:
+        self.cheap = AdmissionPool(
+            "cheap",
+            max_concurrency=settings.admission_cheap_max_concurrency,
+            queue_depth=settings.admission_cheap_queue_depth,
+            queue_timeout=settings.admission_queue_timeout,
+            retry_after=settings.admission_retry_after,
+        )
+        self.expensive = AdmissionPool(
+            "expensive",
+            max_concurrency=settings.admission_expensive_max_concurrency,
+            queue_depth=settings.admission_expensive_queue_depth,
+            queue_timeout=settings.admission_queue_timeout,
+            retry_after=settings.admission_retry_after,
+        )
+        self.rate_limiter = RateLimiter(
+            settings.rate_limit_requests_per_minute, settings.rate_limit_api_keys
+        )
+
+    def pool(self, expensive: bool) -> AdmissionPool:
+        return self.expensive if expensive else self.cheap
+
+    def metrics(self) -> dict:
+        return {
+            "pools": {
+                self.cheap.name: self.cheap.metrics(),
+                self.expensive.name: self.expensive.metrics(),
+            },
+            "rate_limit": self.rate_limiter.metrics(),
+        }
+
+
+@lru_cache
+def get_admission_controller() -> AdmissionController:
+    """Shared across requests so pools and rate limits apply process-wide."""
+    return AdmissionController(get_settings())
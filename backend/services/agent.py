@@ -1,35 +1,102 @@
+
+import asyncio
 import json
-from typing import Optional
+import random
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import AsyncIterator, List, Optional, Sequence, Tuple, Union
 
-from openai import OpenAI
+from openai import (
+    APIConnectionError,
+    APIStatusError,
+    AsyncOpenAI,
+    InternalServerError,
+    RateLimitError,
+)
 
-from backend.config import CalculationConfig, Settings, get_calculation_config
+from backend.config import CalculationConfig, Settings, get_calculation_config, get_settings
 from backend.schemas.schemas import PropertyType, CalcBreakdown
 
 
+@dataclass
+class PortfolioItem:
+    """Input for a single property of a portfolio analysis."""
+
+    property_type: PropertyType
+    actual_purchase_price: float
+    cpi_index: float
+    index_factor: float
+    calc: CalcBreakdown
+
+
+@dataclass
+class PropertyAnalysis:
+    """AI analysis of a single portfolio property, identified by its position."""
+
+    index: int
+    analysis_text: str
+    tokens_used: int = 0
+
+
+@dataclass
+class PortfolioSummary:
+    """AI summary over all portfolio properties."""
+
+    summary_text: str
+    tokens_used: int = 0
+    total_tokens_used: int = 0
+
+
+class _TokenBudget:
+    """Soft token budget shared by concurrent calls; calls already in flight may overshoot it."""
+
+    def __init__(self, limit: Optional[int]) -> None:
+        self._limit = limit
+        self.used = 0
+
+    @property
+    def exhausted(self) -> bool:
+        return self._limit is not None and self.used >= self._limit
+
+    @property
+    def remaining(self) -> Optional[int]:
+        return None if self._limit is None else max(self._limit - self.used, 0)
+
+    def consume(self, tokens: int) -> None:
+        self.used += tokens
+
+
+# Rough size of a token in English text / JSON, used to bound prompt sizes.
+_CHARS_PER_TOKEN = 4
+
+# Errors worth retrying; APITimeoutError is a subclass of APIConnectionError.
+_RETRYABLE_ERRORS = (RateLimitError, APIConnectionError, InternalServerError)
+
+
 class AIAnalystService:
     """AI calc analysis using OpenAI."""
 
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
-        self._client: Optional[OpenAI] = None
+        self._async_client: Optional[AsyncOpenAI] = None
 
-    def _client_or_raise(self) -> OpenAI:
-        if self._client is None:
+    def _async_client_or_raise(self) -> AsyncOpenAI:
+        if self._async_client is None:
             if not self._settings.openai_api_key:
                 raise RuntimeError("OPENAI_API_KEY is required for AI Analyst")
-            self._client = OpenAI(api_key=self._settings.openai_api_key)
-        return self._client
+            # Retries (rate limits and transient errors) are handled in _complete_with_retry.
+            self._async_client = AsyncOpenAI(
+                api_key=self._settings.openai_api_key, max_retries=0
+            )
+        return self._async_client
 
-    def generate_analysis(
-        self,
+    @staticmethod
+    def _analysis_messages(
         property_type: PropertyType,
         cpi_index: float,
         index_factor: float,
         calc: CalcBreakdown,
-    ) -> str:
-        """Return a short explanation of the calc (residential/commercial, CPI, comparison)."""
-        client = self._client_or_raise()
+    ) -> List[dict]:
         cfg: CalculationConfig = get_calculation_config()
         payload = {
             "property_type": property_type.value,
@@ -37,18 +104,205 @@ class AIAnalystService:
             "index_factor_vs_oct_2001": index_factor,
             "calc": calc.model_dump(),
         }
-        system = cfg.agent_system_prompt
         user = (
             "Use the following structured data to explain the calc.\n\n"
             f"JSON data:\n{json.dumps(payload, indent=2)}\n\n"
             f"{cfg.agent_user_requirements}"
         )
-        response = client.chat.completions.create(
-            model=self._settings.openai_model,
-            messages=[
-                {"role": "system", "content": system},
-                {"role": "user", "content": user},
-            ],
-            temperature=0.3,
+        return [
+            {"role": "system", "content": cfg.agent_system_prompt},
+            {"role": "user", "content": user},
+        ]
+
+    @staticmethod
+    def _summary_messages(
+        items: Sequence[PortfolioItem],
+        analyses: Sequence[PropertyAnalysis],
+        token_limit: Optional[int] = None,
+    ) -> List[dict]:
+        """
+        Feed the per-property results to the summary call as compact JSON lines.
+        Beyond the input token cap (and token_limit, if lower), the analysis excerpts
+        are dropped first, then trailing properties.
+        """
+        cfg: CalculationConfig = get_calculation_config()
+        max_tokens = cfg.agent_portfolio_max_input_tokens
+        if token_limit is not None:
+            max_tokens = min(max_tokens, token_limit)
+        intro = (
+            "Use the following per-property results (one JSON object per line) to summarize "
+            "the portfolio.\n\n"
+        )
+        outro = f"\n\n{cfg.agent_portfolio_requirements}"
+        max_chars = (
+            max_tokens * _CHARS_PER_TOKEN
+            - len(cfg.agent_system_prompt)
+            - len(intro)
+            - len(outro)
         )
-        return response.choices[0].message.content or ""
+
+        excerpt_chars = cfg.agent_portfolio_excerpt_chars
+        texts = {a.index: a.analysis_text for a in analyses}
+        rows = []
+        notes = []
+        for i, item in enumerate(items):
+            calc = item.calc
+            rows.append(
+                {
+                    "i": i,
+                    "type": item.property_type.value,
+                    "idx_factor": round(item.index_factor, 3),
+                    "total": calc.theoretical_total_value,
+                    "land": calc.land_value,
+                    "land_pct": round(calc.land_share_percent, 1),
+                    "price": item.actual_purchase_price,
+                }
+            )
+            notes.append(texts[i][:excerpt_chars] if excerpt_chars and texts.get(i) else None)
+
+        def dump(row: dict) -> str:
+            return json.dumps(row, separators=(",", ":"), ensure_ascii=False)
+
+        lines = [dump({**row, "note": note} if note else row) for row, note in zip(rows, notes)]
+        if sum(len(line) + 1 for line in lines) > max_chars:
+            lines = [dump(row) for row in rows]
+        kept: List[str] = []
+        used = 0
+        for line in lines:
+            used += len(line) + 1
+            if used > max_chars:
+                break
+            kept.append(line)
+        if len(kept) < len(lines):
+            kept.append(f"({len(lines) - len(kept)} more properties omitted for length)")
+
+        return [
+            {"role": "system", "content": cfg.agent_system_prompt},
+            {"role": "user", "content": intro + "\n".join(kept) + outro},
+        ]
+
+    async def generate_analysis(
+        self,
+        property_type: PropertyType,
+        cpi_index: float,
+        index_factor: float,
+        calc: CalcBreakdown,
+    ) -> str:
+        """Return a short explanation of the calc (residential/commercial, CPI, comparison)."""
+        text, _ = await self._complete_with_retry(
+            self._analysis_messages(property_type, cpi_index, index_factor, calc)
+        )
+        return text
+
+    async def aclose(self) -> None:
+        """Close the shared OpenAI client and its connection pool."""
+        if self._async_client is not None:
+            await self._async_client.close()
+            self._async_client = None
+
+    async def _complete_with_retry(self, messages: List[dict]) -> Tuple[str, int]:
+        """
+        Run a chat completion, backing off exponentially on rate limits and transient
+        failures (connection errors, timeouts, 5xx responses).
+        """
+        client = self._async_client_or_raise()
+        attempt = 0
+        while True:
+            try:
+                response = await client.chat.completions.create(
+                    model=self._settings.openai_model,
+                    messages=messages,
+                    temperature=0.3,
+                )
+            except _RETRYABLE_ERRORS as exc:
+                if attempt >= self._settings.openai_max_retries:
+                    raise
+                await asyncio.sleep(self._retry_delay(exc, attempt))
+                attempt += 1
+                continue
+            tokens = response.usage.total_tokens if response.usage else 0
+            return response.choices[0].message.content or "", tokens
+
+    def _retry_delay(self, exc: Exception, attempt: int) -> float:
+        """
+        Honor the server's Retry-After, else exponential backoff with jitter;
+        either way capped at openai_retry_max_delay.
+        """
+        max_delay = self._settings.openai_retry_max_delay
+        retry_after = (
+            exc.response.headers.get("retry-after") if isinstance(exc, APIStatusError) else None
+        )
+        try:
+            if retry_after is not None:
+                return min(max(float(retry_after), 0.0), max_delay)
+        except ValueError:
+            pass
+        delay = self._settings.openai_retry_base_delay * (2 ** attempt)
+        return min(delay + random.uniform(0, delay / 2), max_delay)
+
+    async def stream_portfolio_analysis(
+        self, items: Sequence[PortfolioItem]
+    ) -> AsyncIterator[Union[PropertyAnalysis, PortfolioSummary]]:
+        """
+        Analyze all properties concurrently and yield each PropertyAnalysis as it finishes,
+        followed by a single PortfolioSummary.
+        """
+        self._async_client_or_raise()
+        semaphore = asyncio.Semaphore(self._settings.openai_max_concurrency)
+        budget = _TokenBudget(self._settings.openai_token_budget)
+
+        async def analyze(index: int, item: PortfolioItem) -> PropertyAnalysis:
+            async with semaphore:
+                if budget.exhausted:
+                    return PropertyAnalysis(
+                        index=index, analysis_text="AI analysis skipped: token budget exhausted"
+                    )
+                messages = self._analysis_messages(
+                    item.property_type, item.cpi_index, item.index_factor, item.calc
+                )
+                try:
+                    text, tokens = await self._complete_with_retry(messages)
+                except Exception as exc:  # noqa: BLE001
+                    return PropertyAnalysis(
+                        index=index, analysis_text=f"AI analysis unavailable: {exc}"
+                    )
+                budget.consume(tokens)
+                return PropertyAnalysis(index=index, analysis_text=text, tokens_used=tokens)
+
+        tasks = [asyncio.create_task(analyze(i, item)) for i, item in enumerate(items)]
+        analyses: List[PropertyAnalysis] = []
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                analysis = await next_done
+                analyses.append(analysis)
+                yield analysis
+        finally:
+            for task in tasks:
+                task.cancel()
+
+        if budget.exhausted:
+            yield PortfolioSummary(
+                summary_text="AI portfolio summary skipped: token budget exhausted",
+                total_tokens_used=budget.used,
+            )
+            return
+        try:
+            text, tokens = await self._complete_with_retry(
+                self._summary_messages(items, analyses, budget.remaining)
+            )
+        except Exception as exc:  # noqa: BLE001
+            yield PortfolioSummary(
+                summary_text=f"AI portfolio summary unavailable: {exc}",
+                total_tokens_used=budget.used,
+            )
+            return
+        budget.consume(tokens)
+        yield PortfolioSummary(
+            summary_text=text, tokens_used=tokens, total_tokens_used=budget.used
+        )
+
+
+@lru_cache
+def get_agent_service() -> AIAnalystService:
+    """Shared AI Analyst, so all requests reuse one OpenAI client and its connections."""
+    return AIAnalystService(get_settings())
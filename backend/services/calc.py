@@ -1,4 +1,6 @@
+from array import array
 from decimal import Decimal, ROUND_HALF_UP
+from typing import Dict, Iterator, Sequence
 
 from backend.config import get_calculation_config
 from backend.schemas.schemas import PropertyType, CalcBreakdown, CalcRequest
@@ -14,6 +16,41 @@ def _round_one_decimal(value: float) -> float:
     return float(Decimal(value).quantize(Decimal("0.1"), rounding=ROUND_HALF_UP))
 
 
+class CalcBreakdownColumns:
+    """
+    Struct-of-arrays storage for many CalcBreakdown results.
+    Each field is a flat float array; CalcBreakdown models are only built on access.
+    """
+
+    __slots__ = ("_columns",)
+
+    FIELDS = tuple(CalcBreakdown.model_fields)
+
+    def __init__(self) -> None:
+        self._columns: Dict[str, array] = {name: array("d") for name in self.FIELDS}
+
+    def append(self, **values: float) -> None:
+        for name in self.FIELDS:
+            self._columns[name].append(values[name])
+
+    def column(self, name: str) -> array:
+        return self._columns[name]
+
+    def __len__(self) -> int:
+        return len(self._columns[self.FIELDS[0]])
+
+    def row(self, i: int) -> Dict[str, float]:
+        """Plain dict of one row, for serializing without building a model."""
+        return {name: col[i] for name, col in self._columns.items()}
+
+    def __getitem__(self, i: int) -> CalcBreakdown:
+        return CalcBreakdown.model_construct(**self.row(i))
+
+    def __iter__(self) -> Iterator[CalcBreakdown]:
+        for i in range(len(self)):
+            yield self[i]
+
+
 class CalcService:
     """Standard Income Capitalization Approach (Ertragswertverfahren)."""
 
@@ -24,29 +61,48 @@ class CalcService:
         index_factor: float,
     ) -> CalcBreakdown:
         """Compute land/building allocation and theoretical values."""
+        return self.calculate_series(request, [index_factor])[0]
+
+    def calculate_series(
+        self,
+        request: CalcRequest,
+        index_factors: Sequence[float],
+    ) -> CalcBreakdownColumns:
+        """Compute the allocation of one property for each CPI index factor."""
+        columns = CalcBreakdownColumns()
+        self._append_series(columns, request, index_factors)
+        return columns
+
+    def calculate_batch(
+        self,
+        requests: Sequence[CalcRequest],
+        index_factors: Sequence[float],
+    ) -> CalcBreakdownColumns:
+        """Compute the allocation of each property with its own CPI index factor."""
+        columns = CalcBreakdownColumns()
+        for request, index_factor in zip(requests, index_factors):
+            self._append_series(columns, request, [index_factor])
+        return columns
+
+    def _append_series(
+        self,
+        columns: CalcBreakdownColumns,
+        request: CalcRequest,
+        index_factors: Sequence[float],
+    ) -> None:
+        """
+        Only admin and maintenance costs depend on the index factor, so everything
+        else is computed once and reused for the whole series.
+        """
         prop_type = request.property_type
         rent_monthly = request.monthly_net_cold_rent
 
         land_value = _round_eur(request.standard_land_value_per_sqm * request.plot_area_sqm)
         annual_gross_income = _round_eur(rent_monthly * 12.0)
-
-        admin_costs = self._admin_costs(
-            prop_type, index_factor, annual_gross_income,
-            request.num_residential_units or 0, request.num_parking_units,
-        )
-        maintenance_costs = self._maintenance_costs(
-            prop_type, index_factor, request.living_area_sqm, request.num_parking_units,
-        )
         rent_loss_risk = self._rent_loss_risk(prop_type, annual_gross_income)
 
-        total_management_costs = _round_eur(
-            admin_costs + maintenance_costs + rent_loss_risk
-        )
-        annual_net_income = _round_eur(annual_gross_income - total_management_costs)
-
         yield_decimal = request.property_yield_percent / 100.0
         land_interest = _round_eur(land_value * yield_decimal)
-        building_net_income = _round_eur(annual_net_income - land_interest)
 
         n = request.remaining_useful_life_years
         multiplier = (
@@ -54,44 +110,60 @@ class CalcService:
             if yield_decimal > 0
             else float(n)
         )
-        theoretical_building_value = _round_eur(building_net_income * multiplier)
-        theoretical_total_value = _round_eur(theoretical_building_value + land_value)
-
-        if theoretical_total_value <= 0:
-            building_share_percent = 0.0
-            land_share_percent = 0.0
-            building_value_from_purchase_price = 0.0
-            land_value_from_purchase_price = 0.0
-        else:
-            building_share_percent = (
-                theoretical_building_value / theoretical_total_value * 100.0
-            )
-            land_share_percent = land_value / theoretical_total_value * 100.0
-            building_value_from_purchase_price = _round_eur(
-                request.actual_purchase_price * building_share_percent / 100.0
+
+        for index_factor in index_factors:
+            admin_costs = self._admin_costs(
+                prop_type, index_factor, annual_gross_income,
+                request.num_residential_units or 0, request.num_parking_units,
             )
-            land_value_from_purchase_price = _round_eur(
-                request.actual_purchase_price * land_share_percent / 100.0
+            maintenance_costs = self._maintenance_costs(
+                prop_type, index_factor, request.living_area_sqm, request.num_parking_units,
             )
 
-        return CalcBreakdown(
-            land_value=land_value,
-            annual_gross_income=annual_gross_income,
-            admin_costs=admin_costs,
-            maintenance_costs=maintenance_costs,
-            rent_loss_risk=rent_loss_risk,
-            total_management_costs=total_management_costs,
-            annual_net_income=annual_net_income,
-            land_interest=land_interest,
-            building_net_income=building_net_income,
-            multiplier_barwertfaktor=multiplier,
-            theoretical_building_value=theoretical_building_value,
-            theoretical_total_value=theoretical_total_value,
-            building_share_percent=building_share_percent,
-            land_share_percent=land_share_percent,
-            building_value_from_purchase_price=building_value_from_purchase_price,
-            land_value_from_purchase_price=land_value_from_purchase_price,
-        )
+            total_management_costs = _round_eur(
+                admin_costs + maintenance_costs + rent_loss_risk
+            )
+            annual_net_income = _round_eur(annual_gross_income - total_management_costs)
+            building_net_income = _round_eur(annual_net_income - land_interest)
+
+            theoretical_building_value = _round_eur(building_net_income * multiplier)
+            theoretical_total_value = _round_eur(theoretical_building_value + land_value)
+
+            if theoretical_total_value <= 0:
+                building_share_percent = 0.0
+                land_share_percent = 0.0
+                building_value_from_purchase_price = 0.0
+                land_value_from_purchase_price = 0.0
+            else:
+                building_share_percent = (
+                    theoretical_building_value / theoretical_total_value * 100.0
+                )
+                land_share_percent = land_value / theoretical_total_value * 100.0
+                building_value_from_purchase_price = _round_eur(
+                    request.actual_purchase_price * building_share_percent / 100.0
+                )
+                land_value_from_purchase_price = _round_eur(
+                    request.actual_purchase_price * land_share_percent / 100.0
+                )
+
+            columns.append(
+                land_value=land_value,
+                annual_gross_income=annual_gross_income,
+                admin_costs=admin_costs,
+                maintenance_costs=maintenance_costs,
+                rent_loss_risk=rent_loss_risk,
+                total_management_costs=total_management_costs,
+                annual_net_income=annual_net_income,
+                land_interest=land_interest,
+                building_net_income=building_net_income,
+                multiplier_barwertfaktor=multiplier,
+                theoretical_building_value=theoretical_building_value,
+                theoretical_total_value=theoretical_total_value,
+                building_share_percent=building_share_percent,
+                land_share_percent=land_share_percent,
+                building_value_from_purchase_price=building_value_from_purchase_price,
+                land_value_from_purchase_price=land_value_from_purchase_price,
+            )
 
     @staticmethod
     def _admin_costs(
@@ -1,37 +1,201 @@
 import json
-from dataclasses import dataclass
+import math
+import mmap
+import os
+import shutil
+import stat
+import struct
+import sys
+import tempfile
+from array import array
+from dataclasses import dataclass, field
 from datetime import date
-from typing import Dict, Tuple
+from functools import lru_cache
+from typing import BinaryIO, Callable, Dict, Iterable, Iterator, Optional, Tuple
 
 import httpx
 
-from backend.config import get_calculation_config
+from backend.config import get_calculation_config, get_settings
 from backend.config import Settings
 
 
-@dataclass
+@dataclass(slots=True)
 class CPIInfo:
     """CPI value for a specific month/year and derived index factor."""
 
     year: int
     month: int
     cpi_index: float
+    index_factor: float = field(init=False)
+
+    def __post_init__(self) -> None:
+        self.index_factor = self.cpi_index / get_calculation_config().cpi_base_oct_2001
+
+
+class CPISeries:
+    """October CPI values for a contiguous year range, stored as flat arrays."""
+
+    __slots__ = ("start_year", "cpi_indices", "index_factors")
+
+    def __init__(self, start_year: int, cpi_indices: Iterable[float]) -> None:
+        base = get_calculation_config().cpi_base_oct_2001
+        self.start_year = start_year
+        self.cpi_indices = array("d", cpi_indices)
+        self.index_factors = array("d", (v / base for v in self.cpi_indices))
 
     @property
-    def index_factor(self) -> float:
-        return self.cpi_index / get_calculation_config().cpi_base_oct_2001
+    def end_year(self) -> int:
+        return self.start_year + len(self.cpi_indices) - 1
+
+    def __len__(self) -> int:
+        return len(self.cpi_indices)
+
+    def __getitem__(self, year: int) -> CPIInfo:
+        offset = year - self.start_year
+        if not 0 <= offset < len(self.cpi_indices):
+            raise KeyError(year)
+        return CPIInfo(year=year, month=10, cpi_index=self.cpi_indices[offset])
+
+    def __iter__(self) -> Iterator[CPIInfo]:
+        for year in range(self.start_year, self.end_year + 1):
+            yield self[year]
 
 
 class CPIDataError(RuntimeError):
     """Raised when CPI data cannot be fetched or parsed."""
 
 
+def _file_mode(path: str) -> int:
+    """Permission bits for path: those of the existing file, else what open() would use."""
+    try:
+        return stat.S_IMODE(os.stat(path).st_mode)
+    except FileNotFoundError:
+        umask = os.umask(0)
+        os.umask(umask)
+        return 0o666 & ~umask
+
+
+def _replace_file(
+    path: str,
+    write: Callable[[BinaryIO], None],
+    validate: Optional[Callable[[str], object]] = None,
+) -> None:
+    """
+    Write (and optionally validate) a temp file next to path, then rename it over
+    path, so processes that have the old file mapped keep reading the old contents.
+    The file keeps the mode of the file it replaces (new files get 0666 minus umask).
+    """
+    fd, tmp_path = tempfile.mkstemp(
+        dir=os.path.dirname(os.path.abspath(path)), prefix=".cpi_snapshot."
+    )
+    try:
+        with os.fdopen(fd, "wb") as f:
+            write(f)
+            f.flush()
+            os.fsync(f.fileno())
+        if validate is not None:
+            validate(tmp_path)
+        os.chmod(tmp_path, _file_mode(path))
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.unlink(tmp_path)
+        raise
+
+
+class CPISnapshot:
+    """
+    Memory-mapped offline copy of the October CPI series.
+    Layout (all little-endian): 16-byte header (magic, version, start year, count),
+    then one float64 per year starting at the start year; NaN marks a year without a value.
+    """
+
+    MAGIC = b"KPACPI\0\0"
+    VERSION = 1
+    _HEADER = struct.Struct("<8sHHI")
+
+    __slots__ = ("path", "start_year", "_mmap", "_values")
+
+    def __init__(self, path: str) -> None:
+        self.path = path
+        try:
+            with open(path, "rb") as f:
+                self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        except (OSError, ValueError) as exc:
+            raise CPIDataError(f"Cannot open CPI snapshot {path}: {exc}") from exc
+
+        if len(self._mmap) < self._HEADER.size:
+            raise CPIDataError(f"CPI snapshot {path} is truncated")
+        magic, version, start_year, count = self._HEADER.unpack_from(self._mmap)
+        if magic != self.MAGIC:
+            raise CPIDataError(f"{path} is not a CPI snapshot")
+        if version != self.VERSION:
+            raise CPIDataError(
+                f"CPI snapshot {path} has version {version}, expected {self.VERSION}"
+            )
+        end = self._HEADER.size + 8 * count
+        if len(self._mmap) != end:
+            raise CPIDataError(f"CPI snapshot {path} is truncated")
+        self.start_year = start_year
+        if sys.byteorder == "little":
+            self._values = memoryview(self._mmap)[self._HEADER.size:end].cast("d")
+        else:
+            self._values = array("d", self._mmap[self._HEADER.size:end])
+            self._values.byteswap()
+            self._mmap.close()
+
+    @classmethod
+    def write(cls, path: str, octobers: Dict[int, float]) -> None:
+        """Atomically write the given October CPI values (by year) to a snapshot file."""
+        if not octobers:
+            raise CPIDataError("No CPI values to write")
+        start_year, end_year = min(octobers), max(octobers)
+        values = array(
+            "d", (octobers.get(y, math.nan) for y in range(start_year, end_year + 1))
+        )
+        if sys.byteorder == "big":
+            values.byteswap()
+
+        def write_snapshot(f: BinaryIO) -> None:
+            f.write(cls._HEADER.pack(cls.MAGIC, cls.VERSION, start_year, len(values)))
+            f.write(values.tobytes())
+
+        _replace_file(path, write_snapshot)
+
+    @classmethod
+    def install(cls, source: str, target: str) -> "CPISnapshot":
+        """Atomically copy a snapshot to target, validating the copy before it replaces target."""
+        cls(source)
+        with open(source, "rb") as src:
+            _replace_file(target, lambda f: shutil.copyfileobj(src, f), validate=cls)
+        return cls(target)
+
+    @property
+    def end_year(self) -> int:
+        return self.start_year + len(self._values) - 1
+
+    def october(self, year: int) -> CPIInfo:
+        offset = year - self.start_year
+        value = self._values[offset] if 0 <= offset < len(self._values) else math.nan
+        if math.isnan(value):
+            raise CPIDataError(f"No CPI value for October {year} in snapshot {self.path}")
+        return CPIInfo(year=year, month=10, cpi_index=value)
+
+    def series(self, start_year: int, end_year: int) -> CPISeries:
+        return CPISeries(
+            start_year,
+            [self.october(year).cpi_index for year in range(start_year, end_year + 1)],
+        )
+
+
 class CPIFetcherService:
     """Fetches Consumer Price Index from GENESIS API"""
 
     def __init__(self, settings: Settings) -> None:
         self._settings = settings
         self._cache: Dict[Tuple[int, int], CPIInfo] = {}
+        self._snapshot: Optional[CPISnapshot] = (
+            CPISnapshot(settings.cpi_snapshot_path) if settings.cpi_snapshot_path else None
+        )
 
     def _table_headers(self) -> dict:
         if not self._settings.genesis_username or not self._settings.genesis_password:
@@ -44,9 +208,10 @@ class CPIFetcherService:
             "password": self._settings.genesis_password,
         }
 
-    def _table_form_data(self, target_year: int) -> dict:
+    def _table_form_data(self, start_year: int, end_year: Optional[int] = None) -> dict:
         """Form body for GENESIS API."""
-        year_str = str(target_year)
+        start_str = str(start_year)
+        end_str = str(end_year if end_year is not None else start_year)
         return {
             "regionalkey": "",
             "compress": "false",
@@ -62,7 +227,7 @@ class CPIFetcherService:
             "classifyingvariable1": "",
             "classifyingvariable2": "",
             "language": self._settings.genesis_language,
-            "endyear": year_str,
+            "endyear": end_str,
             "classifyingvariable3": "",
             "transpose": "false",
             "classifyingvariable4": "",
@@ -70,10 +235,10 @@ class CPIFetcherService:
             "classifyingvariable5": "",
             "regionalvariable": "",
             "job": "false",
-            "startyear": year_str,
+            "startyear": start_str,
         }
 
-    def _fetch_table_json(self, target_year: int) -> dict:
+    def _fetch_table_json(self, start_year: int, end_year: Optional[int] = None) -> dict:
         """POST /data/table and return JSON."""
         url = f"{self._settings.genesis_base_url}/data/table"
         try:
@@ -81,7 +246,7 @@ class CPIFetcherService:
                 resp = client.post(
                     url,
                     headers=self._table_headers(),
-                    data=self._table_form_data(target_year),
+                    data=self._table_form_data(start_year, end_year),
                 )
                 resp.raise_for_status()
                 return resp.json()
@@ -92,12 +257,13 @@ class CPIFetcherService:
         except Exception as exc:
             raise CPIDataError(f"GENESIS table request failed: {exc}") from exc
 
-    def _parse_cpi_from_content(self, content: str, target_year: int) -> CPIInfo:
+    @staticmethod
+    def _parse_october_cpis(content: str) -> Dict[int, CPIInfo]:
         """
-        Search the csv file for the CPI value for the target year
+        Search the csv file for the October CPI values of all years it contains
         """
-        target_year_str = str(target_year)
         october_names = ("october", "oktober")
+        found: Dict[int, CPIInfo] = {}
         for line in content.splitlines():
             stripped = line.strip()
             if stripped == "__________":
@@ -107,7 +273,7 @@ class CPIFetcherService:
             cells = [c.strip() for c in line.split(";")]
             if len(cells) < 3:
                 continue
-            if cells[0] != target_year_str:
+            if not cells[0].isdigit():
                 continue
             month_cell = cells[1].lower()
             if month_cell not in october_names:
@@ -116,18 +282,22 @@ class CPIFetcherService:
                 cpi_value = float(cells[2].replace(",", "."))
             except ValueError:
                 continue
-            if 0 < cpi_value <= 1000:
-                return CPIInfo(year=target_year, month=10, cpi_index=cpi_value)
-        raise CPIDataError(f"No CPI row found for October {target_year} in CPI table")
+            year = int(cells[0])
+            if 0 < cpi_value <= 1000 and year not in found:
+                found[year] = CPIInfo(year=year, month=10, cpi_index=cpi_value)
+        return found
 
-    async def get_cpi_for_prev_year(self, purchase_date: date) -> CPIInfo:
-        """Return CPI for October of the year prior."""
-        target_year = purchase_date.year - 1
-        cache_key = (target_year, 10)
-        if cache_key in self._cache:
-            return self._cache[cache_key]
+    def _parse_cpi_from_content(self, content: str, target_year: int) -> CPIInfo:
+        """
+        Search the csv file for the CPI value for the target year
+        """
+        info = self._parse_october_cpis(content).get(target_year)
+        if info is None:
+            raise CPIDataError(f"No CPI row found for October {target_year} in CPI table")
+        return info
 
-        data = await self._fetch_table_async(target_year)
+    @staticmethod
+    def _table_content(data: dict) -> str:
         status = data.get("Status") or {}
         if status.get("Code") != 0:
             raise CPIDataError(
@@ -137,20 +307,55 @@ class CPIFetcherService:
         content = obj.get("Content")
         if not content:
             raise CPIDataError("GENESIS table response has no Object.Content")
+        return content
+
+    async def get_cpi_for_prev_year(self, purchase_date: date) -> CPIInfo:
+        """Return CPI for October of the year prior."""
+        target_year = purchase_date.year - 1
+        if self._snapshot is not None:
+            return self._snapshot.october(target_year)
+        cache_key = (target_year, 10)
+        if cache_key in self._cache:
+            return self._cache[cache_key]
 
-        info = self._parse_cpi_from_content(content, target_year)
+        data = await self._fetch_table_async(target_year)
+        info = self._parse_cpi_from_content(self._table_content(data), target_year)
         self._cache[cache_key] = info
         return info
 
-    async def _fetch_table_async(self, target_year: int) -> dict:
-        """Fetch CPI table for the given year return JSON."""
+    async def get_october_series(self, start_year: int, end_year: int) -> CPISeries:
+        """Return October CPI for every year in the range, fetching all missing years in one call."""
+        if self._snapshot is not None:
+            return self._snapshot.series(start_year, end_year)
+        missing = [y for y in range(start_year, end_year + 1) if (y, 10) not in self._cache]
+        if missing:
+            data = await self._fetch_table_async(missing[0], missing[-1])
+            for year, info in self._parse_october_cpis(self._table_content(data)).items():
+                self._cache.setdefault((year, 10), info)
+
+        cpi_indices = []
+        for year in range(start_year, end_year + 1):
+            info = self._cache.get((year, 10))
+            if info is None:
+                raise CPIDataError(f"No CPI row found for October {year} in CPI table")
+            cpi_indices.append(info.cpi_index)
+        return CPISeries(start_year, cpi_indices)
+
+    def fetch_october_cpis(self, start_year: int, end_year: int) -> Dict[int, CPIInfo]:
+        """Fetch all October CPI values of the year range from GENESIS (blocking)."""
+        data = self._fetch_table_json(start_year, end_year)
+        found = self._parse_october_cpis(self._table_content(data))
+        return {y: info for y, info in found.items() if start_year <= y <= end_year}
+
+    async def _fetch_table_async(self, start_year: int, end_year: Optional[int] = None) -> dict:
+        """Fetch CPI table for the given year (or year range) and return JSON."""
         url = f"{self._settings.genesis_base_url}/data/table"
         try:
             async with httpx.AsyncClient(timeout=30.0) as client:
                 resp = await client.post(
                     url,
                     headers=self._table_headers(),
-                    data=self._table_form_data(target_year),
+                    data=self._table_form_data(start_year, end_year),
                 )
                 resp.raise_for_status()
                 return resp.json()
@@ -160,3 +365,9 @@ class CPIFetcherService:
             raise CPIDataError(f"GENESIS table returned invalid JSON: {exc}") from exc
         except Exception as exc:
             raise CPIDataError(f"GENESIS table request failed: {exc}") from exc
+
+
+@lru_cache
+def get_cpi_service() -> CPIFetcherService:
+    """Shared CPI service, so fetched values (or the snapshot) stay in memory."""
+    return CPIFetcherService(get_settings())
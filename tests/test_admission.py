@@ -0,0 +1,136 @@
+import asyncio
+import inspect
+
+import pytest
+
+from backend.routers import routers
+from backend.services import admission
+from backend.services.admission import AdmissionPool, AdmissionRejected, RateLimiter
+
+
+def _pool(max_concurrency: int = 1, queue_depth: int = 1, queue_timeout: float = 5.0) -> AdmissionPool:
+    return AdmissionPool(
+        "test",
+        max_concurrency=max_concurrency,
+        queue_depth=queue_depth,
+        queue_timeout=queue_timeout,
+        retry_after=7,
+    )
+
+
+class _Clock:
+    def __init__(self) -> None:
+        self.now = 1000.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock(monkeypatch: pytest.MonkeyPatch) -> _Clock:
+    clock = _Clock()
+    monkeypatch.setattr(admission.time, "monotonic", clock)
+    return clock
+
+
+def test_pool_rejects_when_saturated() -> None:
+    async def scenario() -> None:
+        pool = _pool(queue_depth=0)
+        await pool.acquire()
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await pool.acquire()
+        assert exc_info.value.status_code == 503
+        assert exc_info.value.retry_after == 7
+        assert (pool.in_flight, pool.queued, pool.rejected) == (1, 0, 1)
+
+        pool.release()
+        await pool.acquire()
+        assert pool.admitted == 2
+
+    asyncio.run(scenario())
+
+
+def test_pool_rejects_on_queue_timeout() -> None:
+    async def scenario() -> None:
+        pool = _pool(queue_timeout=0.01)
+        await pool.acquire()
+        with pytest.raises(AdmissionRejected) as exc_info:
+            await pool.acquire()
+        assert exc_info.value.status_code == 503
+        assert (pool.in_flight, pool.queued, pool.timed_out) == (1, 0, 1)
+
+    asyncio.run(scenario())
+
+
+def test_pool_counters_restored_when_waiter_cancelled() -> None:
+    async def scenario() -> None:
+        pool = _pool()
+        await pool.acquire()
+        waiter = asyncio.create_task(pool.acquire())
+        await asyncio.sleep(0)
+        assert pool.queued == 1
+
+        waiter.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await waiter
+        assert (pool.in_flight, pool.queued) == (1, 0)
+
+        pool.release()
+        assert pool.in_flight == 0
+        await asyncio.wait_for(pool.acquire(), 0.1)
+        assert pool.in_flight == 1
+
+    asyncio.run(scenario())
+
+
+def test_rate_limiter_refills_and_reports_retry_after(clock: _Clock) -> None:
+    limiter = RateLimiter(requests_per_minute=15)
+    for _ in range(15):
+        limiter.check("a")
+    with pytest.raises(AdmissionRejected) as exc_info:
+        limiter.check("a")
+    assert exc_info.value.status_code == 429
+    assert exc_info.value.retry_after == 4
+    limiter.check("b")
+
+    clock.now += 2
+    with pytest.raises(AdmissionRejected) as exc_info:
+        limiter.check("a")
+    assert exc_info.value.retry_after == 2
+
+    clock.now += 2
+    limiter.check("a")
+    assert limiter.rejected == 2
+
+
+def test_rate_limiter_disabled_without_limit() -> None:
+    limiter = RateLimiter(requests_per_minute=None)
+    for _ in range(100):
+        limiter.check("a")
+    assert limiter.metrics()["tracked_keys"] == 0
+
+
+def test_rate_limiter_keys_only_configured_api_keys() -> None:
+    limiter = RateLimiter(requests_per_minute=1, api_keys=["secret"])
+    assert limiter.key_for("secret", "10.0.0.1") == "key:secret"
+    assert limiter.key_for("made-up", "10.0.0.1") == "addr:10.0.0.1"
+    assert limiter.key_for(None, "10.0.0.1") == "addr:10.0.0.1"
+
+
+def test_rate_limiter_evicts_idle_buckets(clock: _Clock) -> None:
+    limiter = RateLimiter(requests_per_minute=60)
+    for i in range(10):
+        limiter.check(f"addr:10.0.0.{i}")
+    assert limiter.metrics()["tracked_keys"] == 10
+
+    clock.now += 30
+    limiter.check("addr:10.0.0.0")
+    clock.now += 45
+    limiter.check("addr:10.0.0.99")
+    assert limiter.metrics()["tracked_keys"] == 2
+
+
+@pytest.mark.parametrize("dependency", [routers._rate_limit, routers._admission])
+def test_shared_state_dependencies_run_on_event_loop(dependency) -> None:
+    # Sync dependencies run in the threadpool, where bucket updates could race.
+    assert inspect.iscoroutinefunction(dependency)
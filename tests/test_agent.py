@@ -0,0 +1,129 @@
+import asyncio
+import json
+
+import httpx
+import pytest
+from openai import AsyncOpenAI, AuthenticationError, InternalServerError
+
+from backend.config import Settings, get_calculation_config
+from backend.schemas.schemas import CalcBreakdown, PropertyType
+from backend.services.agent import AIAnalystService, PortfolioItem, PropertyAnalysis
+
+_COMPLETION = {
+    "id": "chatcmpl-test",
+    "object": "chat.completion",
+    "created": 0,
+    "model": "gpt-4o-mini",
+    "choices": [
+        {
+            "index": 0,
+            "finish_reason": "stop",
+            "message": {"role": "assistant", "content": "ok"},
+        }
+    ],
+    "usage": {"prompt_tokens": 3, "completion_tokens": 2, "total_tokens": 5},
+}
+
+
+def _service(responses: list) -> tuple:
+    calls = []
+
+    def handler(request: httpx.Request) -> httpx.Response:
+        calls.append(request)
+        response = responses.pop(0)
+        if isinstance(response, Exception):
+            raise response
+        return response
+
+    settings = Settings(openai_api_key="test", openai_retry_base_delay=0.001, openai_max_retries=2)
+    service = AIAnalystService(settings)
+    service._async_client = AsyncOpenAI(
+        api_key="test",
+        max_retries=0,
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(handler)),
+    )
+    return service, calls
+
+
+def test_retries_transient_errors() -> None:
+    service, calls = _service(
+        [
+            httpx.ConnectError("connection refused"),
+            httpx.Response(500, json={"error": {"message": "boom"}}),
+            httpx.Response(200, json=_COMPLETION),
+        ]
+    )
+    text, tokens = asyncio.run(service._complete_with_retry([]))
+    assert (text, tokens, len(calls)) == ("ok", 5, 3)
+
+
+def test_gives_up_after_max_retries() -> None:
+    service, calls = _service(
+        [httpx.Response(503, json={"error": {"message": "busy"}}) for _ in range(3)]
+    )
+    with pytest.raises(InternalServerError):
+        asyncio.run(service._complete_with_retry([]))
+    assert len(calls) == 3
+
+
+def test_does_not_retry_client_errors() -> None:
+    service, calls = _service([httpx.Response(401, json={"error": {"message": "bad key"}})])
+    with pytest.raises(AuthenticationError):
+        asyncio.run(service._complete_with_retry([]))
+    assert len(calls) == 1
+
+
+def test_summary_sends_actual_purchase_price() -> None:
+    calc = CalcBreakdown.model_construct(
+        **{**dict.fromkeys(CalcBreakdown.model_fields, 0.0), "theoretical_total_value": -5.0}
+    )
+    item = PortfolioItem(
+        property_type=PropertyType.COMMERCIAL,
+        actual_purchase_price=350000.0,
+        cpi_index=100.0,
+        index_factor=1.0,
+        calc=calc,
+    )
+    messages = AIAnalystService._summary_messages([item], [])
+    row = json.loads(messages[1]["content"].split("\n\n")[1])
+    assert (row["price"], row["total"]) == (350000.0, -5.0)
+
+
+def _portfolio(count: int) -> tuple:
+    calc = CalcBreakdown.model_construct(**dict.fromkeys(CalcBreakdown.model_fields, 1.0))
+    items = [
+        PortfolioItem(
+            property_type=PropertyType.RESIDENTIAL,
+            actual_purchase_price=100000.0,
+            cpi_index=100.0,
+            index_factor=1.0,
+            calc=calc,
+        )
+        for _ in range(count)
+    ]
+    analyses = [PropertyAnalysis(index=i, analysis_text="x" * 500) for i in range(count)]
+    return items, analyses
+
+
+def _summary_rows(messages: list) -> list:
+    body = messages[1]["content"].split("\n\n")[1]
+    return body.split("\n")
+
+
+def test_summary_keeps_excerpts_within_limit() -> None:
+    items, analyses = _portfolio(3)
+    rows = _summary_rows(AIAnalystService._summary_messages(items, analyses))
+    assert [json.loads(row)["note"] for row in rows] == ["x" * 200] * 3
+
+
+@pytest.mark.parametrize("token_limit", [None, 2000])
+def test_summary_is_trimmed_to_token_limit(token_limit) -> None:
+    items, analyses = _portfolio(1000)
+    messages = AIAnalystService._summary_messages(items, analyses, token_limit)
+    limit = token_limit or get_calculation_config().agent_portfolio_max_input_tokens
+    assert sum(len(m["content"]) for m in messages) <= limit * 4
+
+    rows = _summary_rows(messages)
+    assert "note" not in json.loads(rows[0])
+    assert rows[-1].endswith("more properties omitted for length)")
+    assert int(rows[-1].strip("(").split()[0]) + len(rows) - 1 == 1000
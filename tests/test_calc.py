@@ -0,0 +1,143 @@
+import random
+from datetime import date
+
+import pytest
+
+from backend.schemas.schemas import CalcBreakdown, CalcRequest, PropertyType
+from backend.services.calc import CalcService, _round_eur
+
+INDEX_FACTORS = [0.95, 1.0, 1.2345, 1.3846153846153846, 1.5, 2.0]
+
+
+def _reference_calculate(request: CalcRequest, index_factor: float) -> CalcBreakdown:
+    """The original one-shot calculation, kept as the regression oracle."""
+    prop_type = request.property_type
+    land_value = _round_eur(request.standard_land_value_per_sqm * request.plot_area_sqm)
+    annual_gross_income = _round_eur(request.monthly_net_cold_rent * 12.0)
+    admin_costs = CalcService._admin_costs(
+        prop_type, index_factor, annual_gross_income,
+        request.num_residential_units or 0, request.num_parking_units,
+    )
+    maintenance_costs = CalcService._maintenance_costs(
+        prop_type, index_factor, request.living_area_sqm, request.num_parking_units,
+    )
+    rent_loss_risk = CalcService._rent_loss_risk(prop_type, annual_gross_income)
+    total_management_costs = _round_eur(admin_costs + maintenance_costs + rent_loss_risk)
+    annual_net_income = _round_eur(annual_gross_income - total_management_costs)
+    yield_decimal = request.property_yield_percent / 100.0
+    land_interest = _round_eur(land_value * yield_decimal)
+    building_net_income = _round_eur(annual_net_income - land_interest)
+    n = request.remaining_useful_life_years
+    multiplier = (1 - (1 + yield_decimal) ** (-n)) / yield_decimal
+    theoretical_building_value = _round_eur(building_net_income * multiplier)
+    theoretical_total_value = _round_eur(theoretical_building_value + land_value)
+    if theoretical_total_value <= 0:
+        building_share_percent = land_share_percent = 0.0
+        building_value_from_purchase_price = land_value_from_purchase_price = 0.0
+    else:
+        building_share_percent = theoretical_building_value / theoretical_total_value * 100.0
+        land_share_percent = land_value / theoretical_total_value * 100.0
+        building_value_from_purchase_price = _round_eur(
+            request.actual_purchase_price * building_share_percent / 100.0
+        )
+        land_value_from_purchase_price = _round_eur(
+            request.actual_purchase_price * land_share_percent / 100.0
+        )
+    return CalcBreakdown(
+        land_value=land_value,
+        annual_gross_income=annual_gross_income,
+        admin_costs=admin_costs,
+        maintenance_costs=maintenance_costs,
+        rent_loss_risk=rent_loss_risk,
+        total_management_costs=total_management_costs,
+        annual_net_income=annual_net_income,
+        land_interest=land_interest,
+        building_net_income=building_net_income,
+        multiplier_barwertfaktor=multiplier,
+        theoretical_building_value=theoretical_building_value,
+        theoretical_total_value=theoretical_total_value,
+        building_share_percent=building_share_percent,
+        land_share_percent=land_share_percent,
+        building_value_from_purchase_price=building_value_from_purchase_price,
+        land_value_from_purchase_price=land_value_from_purchase_price,
+    )
+
+
+def _request(**overrides) -> CalcRequest:
+    values = {
+        "property_type": PropertyType.RESIDENTIAL,
+        "purchase_date": date(2020, 5, 1),
+        "actual_purchase_price": 450000.0,
+        "monthly_net_cold_rent": 1850.0,
+        "living_area_sqm": 140.5,
+        "num_residential_units": 2,
+        "num_parking_units": 1,
+        "standard_land_value_per_sqm": 320.0,
+        "plot_area_sqm": 510.0,
+        "remaining_useful_life_years": 45,
+        "property_yield_percent": 2.5,
+    }
+    values.update(overrides)
+    return CalcRequest(**values)
+
+
+REQUESTS = {
+    "residential": _request(),
+    "commercial": _request(
+        property_type=PropertyType.COMMERCIAL,
+        num_residential_units=None,
+        num_parking_units=6,
+        monthly_net_cold_rent=12500.0,
+        living_area_sqm=820.0,
+        property_yield_percent=5.25,
+    ),
+    # Management costs exceed the rent, so the theoretical total value is negative.
+    "non_positive_total": _request(num_residential_units=400, monthly_net_cold_rent=150.0),
+}
+
+
+def test_non_positive_fixture() -> None:
+    calc = _reference_calculate(REQUESTS["non_positive_total"], 1.0)
+    assert calc.theoretical_total_value <= 0
+
+
+@pytest.mark.parametrize("name", REQUESTS)
+def test_series_matches_single_calculation(name: str) -> None:
+    service = CalcService()
+    request = REQUESTS[name]
+    series = service.calculate_series(request, INDEX_FACTORS)
+    assert len(series) == len(INDEX_FACTORS)
+    for i, index_factor in enumerate(INDEX_FACTORS):
+        single = service.calculate(request, cpi_index=0.0, index_factor=index_factor)
+        assert series[i] == single
+        assert single == _reference_calculate(request, index_factor)
+        # model_construct skips validation; the values must still validate as is.
+        assert CalcBreakdown.model_validate(series.row(i)) == single
+
+
+def test_batch_matches_reference_on_random_inputs() -> None:
+    rng = random.Random(20261018)
+    requests = []
+    index_factors = []
+    for _ in range(300):
+        residential = rng.random() < 0.5
+        requests.append(
+            _request(
+                property_type=PropertyType.RESIDENTIAL if residential else PropertyType.COMMERCIAL,
+                num_residential_units=rng.randint(1, 40) if residential else None,
+                num_parking_units=rng.randint(0, 20),
+                monthly_net_cold_rent=round(rng.uniform(100, 50000), 2),
+                living_area_sqm=round(rng.uniform(20, 5000), 1),
+                standard_land_value_per_sqm=round(rng.uniform(5, 3000), 2),
+                plot_area_sqm=round(rng.uniform(50, 20000), 1),
+                remaining_useful_life_years=rng.randint(1, 80),
+                property_yield_percent=round(rng.uniform(0.5, 8), 2),
+                actual_purchase_price=round(rng.uniform(5e4, 5e7), 2),
+            )
+        )
+        index_factors.append(rng.uniform(0.9, 2.0))
+
+    batch = CalcService().calculate_batch(requests, index_factors)
+    assert len(batch) == len(requests)
+    for i, (request, index_factor) in enumerate(zip(requests, index_factors)):
+        assert batch[i] == _reference_calculate(request, index_factor)
@@ -0,0 +1,120 @@
+import math
+import os
+import stat
+import struct
+
+import pytest
+
+from backend import cli
+from backend.services.cpi import CPIDataError, CPISnapshot
+
+OCTOBERS = {2001: 100.0, 2002: 101.25, 2004: 104.5}
+
+
+@pytest.fixture
+def snapshot_path(tmp_path) -> str:
+    path = str(tmp_path / "cpi.bin")
+    CPISnapshot.write(path, OCTOBERS)
+    return path
+
+
+def test_round_trip(snapshot_path: str) -> None:
+    snapshot = CPISnapshot(snapshot_path)
+    assert (snapshot.start_year, snapshot.end_year) == (2001, 2004)
+    for year, value in OCTOBERS.items():
+        info = snapshot.october(year)
+        assert (info.year, info.month, info.cpi_index) == (year, 10, value)
+    assert list(snapshot.series(2001, 2002).cpi_indices) == [100.0, 101.25]
+
+
+@pytest.mark.parametrize("year", [2003, 2000, 2005])
+def test_missing_years_raise(snapshot_path: str, year: int) -> None:
+    with pytest.raises(CPIDataError):
+        CPISnapshot(snapshot_path).october(year)
+
+
+def test_values_are_little_endian(snapshot_path: str) -> None:
+    with open(snapshot_path, "rb") as f:
+        data = f.read()
+    header = struct.Struct("<8sHHI")
+    assert header.unpack_from(data) == (CPISnapshot.MAGIC, CPISnapshot.VERSION, 2001, 4)
+    values = struct.unpack_from("<4d", data, header.size)
+    assert values[:2] == (100.0, 101.25) and math.isnan(values[2]) and values[3] == 104.5
+
+
+def _rewrite(path: str, edit) -> None:
+    with open(path, "rb") as f:
+        data = bytearray(f.read())
+    with open(path, "wb") as f:
+        f.write(edit(data))
+
+
+@pytest.mark.parametrize(
+    "edit, message",
+    [
+        (lambda data: b"NOTACPI\0" + data[8:], "not a CPI snapshot"),
+        (lambda data: data[:8] + struct.pack("<H", 2) + data[10:], "version 2"),
+        (lambda data: data[:-3], "truncated"),
+        (lambda data: data[:10], "truncated"),
+        (lambda data: b"", "Cannot open"),
+    ],
+    ids=["magic", "version", "short-values", "short-header", "empty"],
+)
+def test_rejects_invalid_files(snapshot_path: str, edit, message: str) -> None:
+    _rewrite(snapshot_path, edit)
+    with pytest.raises(CPIDataError, match=message):
+        CPISnapshot(snapshot_path)
+
+
+def test_write_requires_values(tmp_path) -> None:
+    with pytest.raises(CPIDataError):
+        CPISnapshot.write(str(tmp_path / "cpi.bin"), {})
+
+
+def test_cli_import_replaces_target_atomically(snapshot_path: str, tmp_path) -> None:
+    target = str(tmp_path / "installed.bin")
+    CPISnapshot.write(target, {2001: 90.0})
+    running = CPISnapshot(target)
+
+    assert cli.main(["import", snapshot_path, "--target", target]) == 0
+
+    # A process that mapped the old file keeps its values; new opens see the import.
+    assert running.october(2001).cpi_index == 90.0
+    assert CPISnapshot(target).october(2004).cpi_index == 104.5
+    assert sorted(p.name for p in tmp_path.iterdir()) == ["cpi.bin", "installed.bin"]
+
+
+def test_cli_import_rejects_invalid_snapshot(snapshot_path: str, tmp_path, capsys) -> None:
+    bad = str(tmp_path / "bad.bin")
+    with open(bad, "wb") as f:
+        f.write(b"garbage")
+
+    assert cli.main(["import", bad, "--target", snapshot_path]) == 1
+    assert capsys.readouterr().err.startswith("error:")
+    assert CPISnapshot(snapshot_path).october(2001).cpi_index == 100.0
+
+
+def test_cli_import_reports_unwritable_target(snapshot_path: str, tmp_path, capsys) -> None:
+    target = str(tmp_path / "missing-dir" / "cpi.bin")
+    assert cli.main(["import", snapshot_path, "--target", target]) == 1
+    assert capsys.readouterr().err.startswith("error:")
+
+
+@pytest.mark.parametrize("mode", [0o644, 0o640])
+def test_import_keeps_target_mode(snapshot_path: str, tmp_path, mode: int) -> None:
+    target = tmp_path / "installed.bin"
+    CPISnapshot.write(str(target), {2001: 90.0})
+    os.chmod(target, mode)
+
+    assert cli.main(["import", snapshot_path, "--target", str(target)]) == 0
+    assert stat.S_IMODE(target.stat().st_mode) == mode
+
+
+def test_new_snapshot_uses_umask(tmp_path) -> None:
+    path = tmp_path / "new.bin"
+    umask = os.umask(0o027)
+    try:
+        CPISnapshot.write(str(path), OCTOBERS)
+    finally:
+        os.umask(umask)
+    assert stat.S_IMODE(path.stat().st_mode) == 0o640
@@ -0,0 +1,118 @@
+import json
+
+import msgpack
+import pytest
+from fastapi import Depends, FastAPI, Request, Response
+from fastapi.responses import StreamingResponse
+from fastapi.testclient import TestClient
+from pydantic import BaseModel
+
+from backend.routers.msgpack_transport import negotiate, parsed_body, stream_objects
+
+
+class _Item(BaseModel):
+    name: str
+    count: int
+
+
+_app = FastAPI()
+
+
+@_app.post("/items")
+async def _echo(item: _Item = Depends(parsed_body(_Item))) -> dict:
+    return item.model_dump()
+
+
+@pytest.fixture
+def client() -> TestClient:
+    return TestClient(_app)
+
+
+BODY = {"name": "a", "count": 2}
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    [
+        None,
+        "application/json",
+        "application/json; charset=utf-8",
+        "application/merge-patch+json",
+    ],
+)
+def test_json_bodies(client: TestClient, content_type) -> None:
+    headers = {"content-type": content_type} if content_type else {}
+    response = client.post("/items", content=json.dumps(BODY), headers=headers)
+    assert response.status_code == 200
+    assert response.json() == BODY
+
+
+@pytest.mark.parametrize("content_type", ["application/msgpack", "application/x-msgpack"])
+def test_msgpack_bodies(client: TestClient, content_type: str) -> None:
+    response = client.post(
+        "/items", content=msgpack.packb(BODY), headers={"content-type": content_type}
+    )
+    assert response.status_code == 200
+    assert response.json() == BODY
+
+
+@pytest.mark.parametrize(
+    "content_type",
+    ["text/plain", "application/x-www-form-urlencoded", "multipart/form-data; boundary=x"],
+)
+def test_rejects_simple_request_content_types(client: TestClient, content_type: str) -> None:
+    response = client.post(
+        "/items", content=json.dumps(BODY), headers={"content-type": content_type}
+    )
+    assert response.status_code == 415
+
+
+def test_invalid_bodies(client: TestClient) -> None:
+    response = client.post("/items", content=b"{", headers={"content-type": "application/json"})
+    assert response.status_code == 400
+    response = client.post(
+        "/items", content=b"\xc1", headers={"content-type": "application/msgpack"}
+    )
+    assert response.status_code == 400
+    response = client.post("/items", json={"name": "a"})
+    assert response.status_code == 422
+    assert response.json()["detail"][0]["loc"] == ["body", "count"]
+
+
+@_app.post("/negotiated")
+async def _negotiated(request: Request) -> Response:
+    return negotiate(request, _Item(name="a", count=2))
+
+
+@_app.post("/streamed")
+async def _streamed(request: Request) -> StreamingResponse:
+    async def objects():
+        yield BODY
+
+    return stream_objects(request, objects())
+
+
+@pytest.mark.parametrize(
+    "accept, is_msgpack",
+    [
+        (None, False),
+        ("*/*", False),
+        ("application/json", False),
+        ("application/msgpack", True),
+        ("application/x-msgpack, */*", True),
+        ("application/msgpack;q=0, application/json", False),
+        ("application/msgpack;q=0.5, application/json", False),
+        ("application/msgpack;q=0.5, application/json;q=0.2", True),
+    ],
+)
+@pytest.mark.parametrize("path", ["/negotiated", "/streamed"])
+def test_negotiates_on_accept(client: TestClient, path: str, accept, is_msgpack: bool) -> None:
+    response = client.post(path, headers={"accept": accept} if accept else {})
+    assert response.status_code == 200
+    assert response.headers["vary"] == "Accept"
+    if is_msgpack:
+        assert response.headers["content-type"] == "application/msgpack"
+        assert msgpack.unpackb(response.content) == BODY
+    else:
+        assert response.headers["content-type"] in ("application/json", "application/x-ndjson")
+        assert json.loads(response.text) == BODY